@@ -1,12 +1,99 @@
 # dashboard.py
+import html
+import io
 import json
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
-from PIL import Image
 
-figsize = 600
+from plot_files import PLOT_FILES
+
+# -------------------------------
+# Static content (pre-rendered HTML, emitted with st.html)
+# -------------------------------
+_EDA_HTML = (
+    "<p>Through <strong>exploratory data analysis (EDA)</strong> we uncovered key hospital patterns:</p>"
+    "<ul>"
+    "<li>A <strong>dominance of gynecology cases</strong> (over 90k patients per physician) shaping overall patient flow. "
+    "<strong>(This was found to be the most important feature in our model for predicting LOS)</strong></li>"
+    "<li>A <strong>skewed length-of-stay distribution</strong>, with most patients discharged quickly, but a long-tail of extended stays.</li>"
+    "<li>A clear <strong>age × severity interactions</strong>, where older or higher-severity patients required longer admissions.</li>"
+    "</ul>"
+    "<p>While these findings provided valuable context, <strong>EDA alone cannot predict the LOS of an individual admission</strong>. "
+    "To bridge this gap, we developed a machine learning model that transforms messy hospital data into "
+    "a <strong>predictive and interpretable tool</strong> for clinicians and administrators.</p>"
+)
+
+_EVIDENCE_HTML = (
+    "<h3>Evidence</h3>"
+    "<ul>"
+    "<li>Strongest performance in <strong>8–14 days</strong></li>"
+    "<li><strong>≤7 days</strong>: under-recalled (many predicted as 8–14)</li>"
+    "<li><strong>&gt;14 days</strong>: well-identified but errors larger (more variability)</li>"
+    "</ul>"
+)
+
+_INTERPRETATION_HTML = (
+    "<h3>Interpretation</h3>"
+    "<ul>"
+    "<li>Skewed targets cause <strong>shrink-to-middle</strong> behavior</li>"
+    "<li>Short stays get pulled upward; long stays vary more, so absolute error rises</li>"
+    "<li>Overall fit is strong, but <strong>calibration</strong> differs by LOS range</li>"
+    "</ul>"
+)
+
+_ACTION_HTML = (
+    "<h3>Action</h3>"
+    "<ul>"
+    "<li><strong>Normalize skewed features</strong> (e.g., log-transform deposits, scale room counts)</li>"
+    "<li>Add <strong>regularization</strong> (Ridge/Lasso) to reduce overfitting on correlated predictors</li>"
+    "<li><strong>Balance short-stay samples</strong> with class weights or resampling</li>"
+    "</ul>"
+)
+
+# One flexbox instead of three st.columns containers (same 1.2 : 1.2 : 1 split);
+# wraps to a stack on narrow screens like st.columns did
+_EVIDENCE_COLUMNS_HTML = (
+    "<div style='display:flex;flex-wrap:wrap;gap:1rem'>"
+    f"<div style='flex:1.2 1 16rem'>{_EVIDENCE_HTML}</div>"
+    f"<div style='flex:1.2 1 16rem'>{_INTERPRETATION_HTML}</div>"
+    f"<div style='flex:1 1 16rem'>{_ACTION_HTML}</div>"
+    "</div>"
+)
+
+# Success / info / warning style boxes in one block; text colour is fixed so
+# the pale panels stay readable under the dark theme
+_CALLOUT_STYLE = "color:#1f2328;border-radius:.5rem;padding:.5rem 1rem;margin:.5rem 0"
+_INSIGHTS_HTML = (
+    f"<div style='background:#e6f4ea;border-left:4px solid #1a7f37;{_CALLOUT_STYLE}'>"
+    "✅ <strong>Best range (8–14 days)</strong>"
+    "<ul><li>Strong classification metrics</li><li>Low error rates across this bin</li></ul>"
+    "</div>"
+    f"<div style='background:#e7f0fb;border-left:4px solid #1f6feb;{_CALLOUT_STYLE}'>"
+    "ℹ️ <strong>Long stays (&gt;14 days)</strong>"
+    "<ul><li>High recall &amp; precision → well-flagged</li>"
+    "<li>Wider variability inflates error (MAE ≈ {gt14_mae})</li></ul>"
+    "</div>"
+    f"<div style='background:#fff8e1;border-left:4px solid #bf8700;{_CALLOUT_STYLE}'>"
+    "⚠️ <strong>Short stays (≤7 days)</strong>"
+    "<ul><li>Often misclassified as 8–14 → lower recall ({short_recall})</li>"
+    "<li>Despite low MAE, predictions <strong>shrink toward the center bin</strong> "
+    "(common with skewed/imbalanced targets)</li></ul>"
+    "</div>"
+)
+
+_RECOMMENDATION_HTML = (
+    "<h3>💡 Business Recommendation</h3>"
+    "<p>Hospitals can use these insights to <strong>allocate resources by LOS category</strong>:</p>"
+    "<ul>"
+    "<li><strong>Short stays (≤7 days):</strong> Focus on rapid turnover (beds, discharges, staff coverage).</li>"
+    "<li><strong>Medium stays (8–14 days):</strong> Prioritize this group as it represents the majority of admissions.</li>"
+    "<li><strong>Long stays (&gt;14 days):</strong> Plan for higher variability with specialized care units and extended resources.</li>"
+    "</ul>"
+    "<p>Together, exploratory analysis and predictive modeling create a <strong>practical, data-driven foundation</strong> "
+    "for managing patient flow, staffing, and hospital capacity.</p>"
+)
+
 # -------------------------------
 # Page config
 # -------------------------------
@@ -19,7 +106,10 @@ st.set_page_config(
 # -------------------------------
 # Sidebar
 # -------------------------------
-with st.sidebar:
+# Static sections are wrapped in fragments so future widgets only rerun
+# their own fragment instead of the whole script.
+@st.fragment
+def _render_sidebar():
     st.title("🏥 LOS Dashboard")
     st.markdown(
         "Applied ML pipeline for **Length of Stay (LOS)** prediction: "
@@ -35,49 +125,143 @@ with st.sidebar:
     # Data at a glance
     st.subheader("Data at a glance")
     st.markdown(
-    "- Samples: **500,000**  \n"
-    "- Features after encoding: **43**  \n"
-    "- Train/Test split: **70/30** \n"
-    "- Best model: **Random Forest** (MAE **0.89** days, RMSE **1.32**, R² **0.970**)"
-)
+        "- Samples: **500,000**  \n"
+        "- Features after encoding: **43**  \n"
+        "- Train/Test split: **70/30** \n"
+        "- Best model: **Random Forest** (MAE **0.89** days, RMSE **1.32**, R² **0.970**)"
+    )
+
+
+with st.sidebar:
+    _render_sidebar()
 
 # -------------------------------
 # Header
 # -------------------------------
-st.title("Hospital Length of Stay (LOS) Prediction Dashboard")
-st.markdown(
-    "This dashboard showcases a full applied ML pipeline to predict **Length of Stay (LOS)** from hospital admission data."
-)
+@st.fragment
+def _render_header():
+    st.title("Hospital Length of Stay (LOS) Prediction Dashboard")
+    st.markdown(
+        "This dashboard showcases a full applied ML pipeline to predict **Length of Stay (LOS)** from hospital admission data."
+    )
+
+
+_render_header()
 
 # -------------------------------
 # Helpers
 # -------------------------------
 PLOTS_DIR = Path("plots")
 ARTIFACTS_DIR = Path("artifacts")
-ARTIFACTS_DIR.mkdir(exist_ok=True, parents=True)
 
-def callout(kind: str, title: str, body: str):
-    kinds = {"info": st.info, "success": st.success, "warning": st.warning}
-    kinds.get(kind, st.info)(f"**{title}** — {body}")
 
+@st.cache_resource
+def _ensure_artifacts_dir() -> bool:
+    """Create artifacts/ once per process rather than on every rerun."""
+    ARTIFACTS_DIR.mkdir(exist_ok=True, parents=True)
+    return True
 
-def load_png(name: str) -> Image.Image | None:
-    path = PLOTS_DIR / name
-    if path.exists():
-        try:
-            return Image.open(path)
-        except Exception as e:
-            st.warning(f"Could not open `{name}`: {e}")
+
+_ensure_artifacts_dir()
+
+
+def _mtime(path: Path) -> float | None:
+    """Single stat() in place of exists() + stat()."""
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def _thumbnail(data: bytes, width: int = 1200) -> bytes:
+    """Downscale an image so the browser gets fewer bytes.
+
+    The default is twice the 600px display width so charts stay sharp on
+    HiDPI screens. Images already at or below ``width`` are returned
+    untouched. WebP input (already lossy from the transcode script) is
+    re-encoded losslessly, images with an alpha channel stay PNG, and
+    opaque ones are re-encoded as JPEG.
+    """
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data))
+    if img.width <= width:
+        return data
+    src_format = img.format
+    img.thumbnail((width, width * 4))
+    buf = io.BytesIO()
+    if src_format == "WEBP":
+        img.save(buf, format="WEBP", lossless=True, method=6)
+    elif img.mode in ("RGBA", "LA", "P"):
+        img.save(buf, format="PNG", optimize=True)
     else:
+        img.convert("RGB").save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _plot_mtimes() -> tuple[tuple[float | None, float | None], ...]:
+    """(PNG mtime, WebP mtime) for each figure; the cache key for _load_all_plots."""
+    return tuple(
+        (_mtime(PLOTS_DIR / name), _mtime((PLOTS_DIR / name).with_suffix(".webp")))
+        for name in PLOT_FILES
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _load_all_plots(
+    mtimes: tuple[tuple[float | None, float | None], ...],
+) -> tuple[dict[str, bytes], dict[str, str]]:
+    """Read every figure in one pass, keyed on the per-file mtimes.
+
+    A WebP copy (see scripts/transcode_plots.py) is preferred over the PNG
+    unless the PNG is newer, i.e. it was regenerated after transcoding.
+    Returns ``(images, errors)``: figures that exist but cannot be read or
+    decoded are left out of ``images`` and their error message goes in
+    ``errors``.
+    """
+    images, errors = {}, {}
+    for name, (png_mtime, webp_mtime) in zip(PLOT_FILES, mtimes):
+        path = PLOTS_DIR / name
+        webp = path.with_suffix(".webp")
+        fresh_webp = webp_mtime is not None and webp_mtime >= (png_mtime or 0.0)
+        for candidate in ((webp, path) if fresh_webp else (path,)):
+            try:
+                images[name] = _thumbnail(candidate.read_bytes())
+                break
+            except FileNotFoundError:
+                continue  # get_plot shows the "add this figure" hint
+            except Exception as e:
+                errors[name] = str(e)
+                break
+    return images, errors
+
+
+def get_plot(images: dict[str, bytes], errors: dict[str, str], name: str) -> bytes | None:
+    """Return the loaded bytes for ``name``, or show why it is unavailable."""
+    if name in errors:
+        st.warning(f"Could not open `{name}`: {errors[name]}")
+    elif name not in images:
         st.info(f"Add `{name}` to the `plots/` folder to display this figure.")
-    return None
+    return images.get(name)
+
+METRICS_PATH = ARTIFACTS_DIR / "metrics.json"
+
 
 def load_metrics() -> dict:
-    """Load artifacts/metrics.json or fall back to example values."""
-    mpath = ARTIFACTS_DIR / "metrics.json"
-    if mpath.exists():
+    """Load artifacts/metrics.json or fall back to example values.
+
+    Parsing is cached across reruns and persisted to disk so it survives
+    process restarts; the file's mtime is part of the cache key so editing
+    metrics.json invalidates it.
+    """
+    return _load_metrics_cached(_mtime(METRICS_PATH))
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def _load_metrics_cached(mtime: float | None) -> dict:
+    if mtime is not None:
         try:
-            return json.loads(mpath.read_text())
+            return json.loads(METRICS_PATH.read_text())
         except Exception as e:
             st.warning(f"Could not parse metrics.json: {e}")
 
@@ -109,39 +293,68 @@ def load_metrics() -> dict:
         ],
     }
 
+def _fmt_score(value) -> str:
+    """Three-decimal score, or '—' when the metric is missing/non-numeric."""
+    return f"{value:.3f}" if isinstance(value, (int, float)) else "—"
+
+
+@st.cache_data(show_spinner=False)
+def _format_metrics(M: dict) -> dict:
+    """Flatten the display strings used across the page into one dict."""
+    return {
+        "model": M.get("model_name", "N/A"),
+        "mae": f"{M['MAE_days']:.2f} days",
+        "r2": f"{M['R2']:.3f}",
+        "binned_acc": f"{M.get('bin_metrics', {}).get('binned_accuracy', '—')}",
+        "gt14_mae": f"{M.get('per_bin_errors', {}).get('>14 days', {}).get('MAE', '—')}",
+        "short_recall": f"{M.get('bin_metrics', {}).get('per_class', {}).get('≤7 days', {}).get('recall', '—')}",
+    }
+
+
+# Figures are loaded once per session; reruns reuse session_state without even
+# a cache lookup. Metrics go through load_metrics() on every run (a cheap
+# mtime-keyed cache hit) so a "Could not parse metrics.json" warning keeps
+# showing instead of only on the first run. The sidebar button drops the
+# caches and reloads from disk.
+refresh = st.sidebar.button("🔄 Refresh data")
+if refresh:
+    _load_metrics_cached.clear()
+    _load_all_plots.clear()
+if refresh or "initialized" not in st.session_state:
+    st.session_state.plots = _load_all_plots(_plot_mtimes())
+    st.session_state.initialized = True
+
 M = load_metrics()
+V = _format_metrics(M)
+plot_images, plot_errors = st.session_state.plots
 
 # -------------------------------
 # EDA Explanation
 # -------------------------------
-st.markdown(
-    "Through **exploratory data analysis (EDA)** we uncovered key hospital patterns:  \n"
-    "- A **dominance of gynecology cases** (over 90k patients per physician) shaping overall patient flow. **(This was found to be the most important feature in our model for predicting LOS)**  \n"
-    "- A **skewed length-of-stay distribution**, with most patients discharged quickly, but a long-tail of extended stays.  \n"
-    "- A clear **age × severity interactions**, where older or higher-severity patients required longer admissions.  \n"
-)
+@st.fragment
+def _render_eda():
+    st.html(_EDA_HTML)
 
-st.markdown(
-    "While these findings provided valuable context, **EDA alone cannot predict the LOS of an individual admission**. "
-    "To bridge this gap, we developed a machine learning model that transforms messy hospital data into "
-    "a **predictive and interpretable tool** for clinicians and administrators."
-)
+
+_render_eda()
 
 
 
 # -------------------------------
 # Model summary cards
 # -------------------------------
+@st.fragment
+def _render_metric_cards(V: dict):
+    colAa, colA, colB, colC = st.columns(4)
+    with colAa: st.metric("Model", V["model"])
+    with colA: st.metric("Overall Model's Absolute Error (MAE)", V["mae"])
+    with colB: st.metric("R²", V["r2"])
+    with colC: st.metric("Binned accuracy", V["binned_acc"])
+
 
 st.header("📊 Model Performance")
-colAa, colA, colB, colC = st.columns(4)
-with colAa: st.metric("Model", M.get("model_name", "N/A"))
-with colA: st.metric("Overall Model's Absolute Error (MAE)", f"{M['MAE_days']:.2f} days")
-with colB: st.metric("R²", f"{M['R2']:.3f}")
-with colC: st.metric("Binned accuracy", f"{M.get('bin_metrics',{}).get('binned_accuracy','—')}")
-callout("info",
-        "Framing",
-        "We predict **Length of Stay** to inform bed turnover, discharge planning, and staffing.")
+_render_metric_cards(V)
+st.info("**Framing** — We predict **Length of Stay** to inform bed turnover, discharge planning, and staffing.")
 
 
 
@@ -161,44 +374,25 @@ st.markdown(
 )
 
 
-cm_img = load_png("confusion_matrix.png")
-if cm_img:
-    st.image(cm_img, caption="Confusion Matrix on Binned Regression Output", width= figsize)#use_container_width=False)
+cm_bytes = get_plot(plot_images, plot_errors, "confusion_matrix.png")
+if cm_bytes:
+    st.image(cm_bytes, caption="Confusion Matrix on Binned Regression Output", width=600)#use_container_width=False)
 
-dist_img = load_png("true_vs_pred_bins.png")
-if dist_img:
-    st.image(dist_img, caption="True vs Predicted LOS Bin Proportions", width= figsize) #use_container_width=False)
+dist_bytes = get_plot(plot_images, plot_errors, "true_vs_pred_bins.png")
+if dist_bytes:
+    st.image(dist_bytes, caption="True vs Predicted LOS Bin Proportions", width=600) #use_container_width=False)
 
 
 # -------------------------------
 # Perspective
 # -------------------------------
-st.subheader("🔎 Evidence → Interpretation → Action")
-col1, col2, col3 = st.columns([1.2, 1.2, 1])
+@st.fragment
+def _render_evidence_columns():
+    st.subheader("🔎 Evidence → Interpretation → Action")
+    st.html(_EVIDENCE_COLUMNS_HTML)
 
-with col1:
-    st.markdown(
-        "### Evidence  \n"
-        "- Strongest performance in **8–14 days**  \n"
-        "- **≤7 days**: under-recalled (many predicted as 8–14)  \n"
-        "- **>14 days**: well-identified but errors larger (more variability)"
-    )
 
-with col2:
-    st.markdown(
-        "### Interpretation  \n"
-        "- Skewed targets cause **shrink-to-middle** behavior  \n"
-        "- Short stays get pulled upward; long stays vary more, so absolute error rises  \n"
-        "- Overall fit is strong, but **calibration** differs by LOS range"
-    )
-
-with col3:
-    st.markdown(
-        "### Action  \n"
-        "- **Normalize skewed features** (e.g., log-transform deposits, scale room counts)  \n"
-        "- Add **regularization** (Ridge/Lasso) to reduce overfitting on correlated predictors  \n"
-        "- **Balance short-stay samples** with class weights or resampling"
-    )
+_render_evidence_columns()
 
 
 
@@ -209,22 +403,13 @@ if "bin_metrics" in M:
     st.subheader("Binned Classification Metrics")
     bm = M["bin_metrics"]
 
-    summary_tbl = pd.DataFrame(
-        {
-            "Metric": ["Binned accuracy", "Balanced accuracy", "Macro F1"],
-            "Score": [
-                bm.get("binned_accuracy"),
-                bm.get("balanced_accuracy"),
-                bm.get("macro_f1"),
-            ],
-        }
-    )
-
-    st.dataframe(
-        summary_tbl.style.format({"Score": "{:.3f}"}), 
-        use_container_width=False,  # keeps table compact
-        height=150
-    )
+    # Plain rows + st.table: no pandas/Styler needed for three static rows
+    rows = [
+        {"Metric": "Binned accuracy", "Score": _fmt_score(bm.get("binned_accuracy"))},
+        {"Metric": "Balanced accuracy", "Score": _fmt_score(bm.get("balanced_accuracy"))},
+        {"Metric": "Macro F1", "Score": _fmt_score(bm.get("macro_f1"))},
+    ]
+    st.table(rows)
 
 
 # ------------------------------- 
@@ -232,34 +417,14 @@ if "bin_metrics" in M:
 # -------------------------------
 st.subheader("Contextualized Model Insights")
 
-st.success(
-    "✅ **Best range (8–14 days)**  \n"
-    "- Strong classification metrics  \n"
-    "- Low error rates across this bin"
-)
-
-st.info(
-    "ℹ️ **Long stays (>14 days)**  \n"
-    "- High recall & precision → well-flagged  \n"
-    f"- Wider variability inflates error (MAE ≈ {M.get('per_bin_errors', {}).get('>14 days', {}).get('MAE', '—')})"
-)
-
-short_recall = (
-    M.get("bin_metrics", {})
-     .get("per_class", {})
-     .get("≤7 days", {})
-     .get("recall", "—")
-)
-
-st.warning(
-    "⚠️ **Short stays (≤7 days)**  \n"
-    f"- Often misclassified as 8–14 → lower recall ({short_recall})  \n"
-    "- Despite low MAE, predictions **shrink toward the center bin** "
-    "(common with skewed/imbalanced targets)"
+st.html(
+    _INSIGHTS_HTML.format(
+        gt14_mae=html.escape(V["gt14_mae"]), short_recall=html.escape(V["short_recall"])
+    )
 )
 
 st.caption(
-    f"📌 **Takeaway:** Excellent overall fit (R² ≈ {M.get('R2', float('nan')):.3f}), "
+    f"📌 **Takeaway:** Excellent overall fit (R² ≈ {V['r2']}), "
     "but calibration, class balance, and use-case thresholds still matter."
 )
 
@@ -272,16 +437,10 @@ st.markdown(
     "Tree-based **feature importance** highlights the following predictors "
     "and directions of effect:"
 )
-feat_importance_img = load_png("feature_importance_visual.png")
-if feat_importance_img:
-    st.image(feat_importance_img, caption="Top 10 predictors of hospital length of stay from the Random Forest model. Department affiliation (especially gynecology), followed by patient age groups (31–40, 41–50), were the strongest drivers of LOS, while operational and financial factors such as admission deposit and available rooms played smaller but notable roles.", width= figsize)#use_container_width=False)
+feat_importance_bytes = get_plot(plot_images, plot_errors, "feature_importance_visual.png")
+if feat_importance_bytes:
+    st.image(feat_importance_bytes, caption="Top 10 predictors of hospital length of stay from the Random Forest model. Department affiliation (especially gynecology), followed by patient age groups (31–40, 41–50), were the strongest drivers of LOS, while operational and financial factors such as admission deposit and available rooms played smaller but notable roles.", width=600)#use_container_width=False)
 
-if isinstance(M.get("top_predictors"), list):
-    for item in M["top_predictors"]:
-        feat = item.get("feature", "Feature")
-        direction = item.get("direction", "")
-        effect = item.get("effect", "")
-        arrow = "↑" if direction == "↑" else "→"
 
 # ------------------------------- 
 # Key Outcome
@@ -307,21 +466,18 @@ st.markdown(
 )
 
 # Business Recommendation
-st.markdown(
-    "### 💡 Business Recommendation  \n"
-    "Hospitals can use these insights to **allocate resources by LOS category**:  \n"
-    "- **Short stays (≤7 days):** Focus on rapid turnover (beds, discharges, staff coverage).  \n"
-    "- **Medium stays (8–14 days):** Prioritize this group as it represents the majority of admissions.  \n"
-    "- **Long stays (>14 days):** Plan for higher variability with specialized care units and extended resources.  \n\n"
-    "Together, exploratory analysis and predictive modeling create a **practical, data-driven foundation** "
-    "for managing patient flow, staffing, and hospital capacity."
-)
+st.html(_RECOMMENDATION_HTML)
 
 # ------------------------------- 
 # Footer
 # -------------------------------
-st.divider()
-st.markdown(
-    "Built by **Oscar Aguilar** — end-to-end applied ML: "
-    "_data cleaning • modeling • fairness checks • interpretation • deployment_."
-)
+@st.fragment
+def _render_footer():
+    st.divider()
+    st.markdown(
+        "Built by **Oscar Aguilar** — end-to-end applied ML: "
+        "_data cleaning • modeling • fairness checks • interpretation • deployment_."
+    )
+
+
+_render_footer()
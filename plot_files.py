@@ -0,0 +1,4 @@
+# plot_files.py
+"""Figures shown by dashboard.py, shared with scripts/transcode_plots.py."""
+
+PLOT_FILES = ("confusion_matrix.png", "true_vs_pred_bins.png", "feature_importance_visual.png")
@@ -0,0 +1,33 @@
+# scripts/transcode_plots.py
+"""Write a .webp copy next to each dashboard figure in plots/.
+
+The dashboard prefers plots/<name>.webp over plots/<name>.png when both
+exist. Re-run this after regenerating any of the PNGs:
+
+    python scripts/transcode_plots.py
+"""
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from plot_files import PLOT_FILES  # noqa: E402
+
+PLOTS_DIR = ROOT / "plots"
+
+
+def main():
+    for name in PLOT_FILES:
+        src = PLOTS_DIR / name
+        if not src.exists():
+            print(f"skip {name} (missing)")
+            continue
+        dst = src.with_suffix(".webp")
+        Image.open(src).save(dst, "webp", quality=85, method=6)
+        print(f"{name}: {src.stat().st_size:,} → {dst.stat().st_size:,} bytes")
+
+
+if __name__ == "__main__":
+    main()